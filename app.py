@@ -5,13 +5,15 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
-import requests
 from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
-import seaborn as sns
-from st_aggrid import AgGrid, GridOptionsBuilder
+from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
 from streamlit_option_menu import option_menu
 import time
+import io
+from pathlib import Path
+import hashlib
+import inspect
+from collections import namedtuple
 
 # Set page configuration
 st.set_page_config(
@@ -106,9 +108,12 @@ if 'vaccine_data' not in st.session_state:
 if 'last_update' not in st.session_state:
     st.session_state.last_update = None
 
+# On-disk copy of the generated data so a restarted app can skip regeneration
+DATA_CACHE_DIR = Path('.cache')
+DATA_CACHE_TTL = 3600  # seconds
+
 # Function to generate sample data (replace with real API in production)
-@st.cache_data(ttl=3600)  # Cache for 1 hour
-def generate_vaccination_data():
+def build_vaccination_data():
     """Generate sample vaccination data for demonstration"""
     
     # Generate dates for the last 12 months
@@ -119,40 +124,65 @@ def generate_vaccination_data():
     # Sample countries
     countries = ['USA', 'India', 'Brazil', 'UK', 'Germany', 'Japan', 
                  'France', 'Italy', 'Canada', 'Australia', 'South Africa', 'Mexico']
+    vaccine_types = ['Pfizer', 'Moderna', 'AstraZeneca', 'Sinovac', 'Johnson&Johnson']
     
-    data = []
-    for country in countries:
-        # Base vaccination rates vary by country
-        if country == 'USA':
-            base_rate = 75
-        elif country == 'India':
-            base_rate = 65
-        elif country == 'Brazil':
-            base_rate = 70
-        else:
-            base_rate = np.random.randint(60, 85)
-        
-        for date in dates:
-            # Add trend and randomness
-            days_from_start = (date - start_date).days
-            trend = days_from_start * 0.1
-            noise = np.random.normal(0, 2)
-            
-            # Calculate rates
-            fully_vaccinated = min(95, base_rate + trend + noise)
-            partially_vaccinated = min(100, fully_vaccinated + np.random.randint(5, 15))
-            
-            data.append({
-                'Date': date,
-                'Country': country,
-                'Fully_Vaccinated_Percentage': max(0, fully_vaccinated),
-                'Partially_Vaccinated_Percentage': max(0, partially_vaccinated),
-                'Doses_Administered': int(np.random.uniform(100000, 10000000)),
-                'Daily_Vaccinations': int(np.random.uniform(5000, 500000)),
-                'Vaccine_Type': np.random.choice(['Pfizer', 'Moderna', 'AstraZeneca', 'Sinovac', 'Johnson&Johnson'], p=[0.4, 0.3, 0.15, 0.1, 0.05])
-            })
-    
-    df = pd.DataFrame(data)
+    n_countries, n_days = len(countries), len(dates)
+    rng = np.random.default_rng(42)
+    
+    # Base vaccination rates vary by country
+    base_rates = rng.integers(60, 85, size=n_countries)
+    base_rates[countries.index('USA')] = 75
+    base_rates[countries.index('India')] = 65
+    base_rates[countries.index('Brazil')] = 70
+    
+    # Add trend and randomness for every (country, day) pair at once
+    trend = np.arange(n_days) * 0.1
+    noise = rng.normal(0, 2, size=(n_countries, n_days))
+    
+    # Calculate rates
+    fully_vaccinated = np.minimum(95, base_rates[:, None] + trend + noise)
+    partially_vaccinated = np.minimum(100, fully_vaccinated + rng.integers(5, 15, size=(n_countries, n_days)))
+    
+    # Country categories are alphabetical so sorts and groupbys order countries as the plain strings did
+    country_codes = np.argsort(np.argsort(countries)).astype(np.int8)
+    
+    # Columnar construction: each column is a contiguous typed array (float32 is plenty for percentages).
+    # Rows are laid out date-major so the frame is already sorted by Date.
+    # Country and Vaccine_Type are categoricals built straight from integer codes.
+    df = pd.DataFrame({
+        'Date': np.repeat(dates.values, n_countries),
+        'Week': np.repeat(dates.isocalendar().week.to_numpy(dtype=np.int16), n_countries),
+        'Country': pd.Categorical.from_codes(np.tile(country_codes, n_days), sorted(countries)),
+        'Fully_Vaccinated_Percentage': np.maximum(0, fully_vaccinated).T.ravel().astype(np.float32),
+        'Partially_Vaccinated_Percentage': np.maximum(0, partially_vaccinated).T.ravel().astype(np.float32),
+        'Doses_Administered': rng.uniform(100000, 10000000, size=n_countries * n_days).astype(np.int64),
+        'Daily_Vaccinations': rng.uniform(5000, 500000, size=n_countries * n_days).astype(np.int64),
+        'Vaccine_Type': pd.Categorical.from_codes(
+            rng.choice(len(vaccine_types), p=[0.4, 0.3, 0.15, 0.1, 0.05], size=n_countries * n_days).astype(np.int8),
+            vaccine_types)
+    })
+    return df
+
+@st.cache_data(ttl=DATA_CACHE_TTL)  # Cache for 1 hour
+def generate_vaccination_data():
+    """Load sample data from the Parquet cache if it is fresh, otherwise generate and store it"""
+    # The file name carries a hash of the generator's source, so editing the generator invalidates it
+    source_hash = hashlib.sha256(inspect.getsource(build_vaccination_data).encode()).hexdigest()[:12]
+    cache_path = DATA_CACHE_DIR / f'vax-{source_hash}.parquet'
+    try:
+        if cache_path.exists() and time.time() - cache_path.stat().st_mtime < DATA_CACHE_TTL:
+            return pd.read_parquet(cache_path)
+    except (ImportError, OSError, ValueError):
+        pass  # No Parquet engine or unreadable file; regenerate below
+    
+    df = build_vaccination_data()
+    try:
+        DATA_CACHE_DIR.mkdir(exist_ok=True)
+        for stale in DATA_CACHE_DIR.glob('vax-*.parquet'):
+            stale.unlink()
+        df.to_parquet(cache_path, compression='zstd')
+    except (ImportError, OSError, ValueError):
+        pass  # Disk cache is best-effort
     return df
 
 # Function to fetch real data (commented out, but ready for real API)
@@ -170,6 +200,267 @@ def fetch_real_vaccination_data():
         st.warning("Could not fetch real-time data. Using sample data.")
         return generate_vaccination_data()
 
+# Shared Plotly layout for the dark theme
+DARK_LAYOUT = dict(
+    plot_bgcolor='rgba(0,0,0,0)',
+    paper_bgcolor='rgba(0,0,0,0)',
+    font_color='white'
+)
+HORIZONTAL_LEGEND = dict(
+    orientation="h",
+    yanchor="bottom",
+    y=1.02,
+    xanchor="right",
+    x=1
+)
+
+# Color scales resolved once at import
+BLUES = list(px.colors.sequential.Blues)
+BLUES_R = list(px.colors.sequential.Blues_r)
+SET2 = list(px.colors.qualitative.Set2)
+
+# Maximum points per line/area trace sent to the browser (roughly the chart's pixel width)
+MAX_CHART_POINTS = 2000
+
+def downsample_lttb(df, x, y, n_out=MAX_CHART_POINTS):
+    """Downsample a time series frame to n_out rows with Largest-Triangle-Three-Buckets.
+    Points are selected on column y; other columns follow the selected rows."""
+    n = len(df)
+    if n <= n_out or n_out < 3:
+        return df
+    
+    xs = df[x].to_numpy()
+    if np.issubdtype(xs.dtype, np.datetime64):
+        xs = xs.astype('int64')
+    xs = xs.astype(np.float64)
+    ys = df[y].to_numpy(dtype=np.float64)
+    
+    # First and last points are always kept; the rest is split into n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_lo, next_hi = hi, edges[i + 2]
+        else:
+            next_lo, next_hi = n - 1, n
+        cx, cy = xs[next_lo:next_hi].mean(), ys[next_lo:next_hi].mean()
+        
+        # Keep the point forming the largest triangle with the previous pick and the next bucket's average
+        area = np.abs((xs[a] - cx) * (ys[lo:hi] - ys[a]) - (xs[a] - xs[lo:hi]) * (cy - ys[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    
+    return df.iloc[selected]
+
+def group_diff(values, groups):
+    """First difference of values within each run of equal group labels (NaN at each group start)"""
+    values = np.asarray(values, dtype=np.float64)
+    groups = np.asarray(groups)
+    diffs = np.empty_like(values)
+    diffs[:1] = np.nan
+    diffs[1:] = values[1:] - values[:-1]
+    diffs[1:][groups[1:] != groups[:-1]] = np.nan
+    return diffs
+
+def count_categories(values):
+    """Counts of the categories present in a categorical Series (largest first), via bincount over its codes"""
+    counts = np.bincount(values.cat.codes.to_numpy(), minlength=len(values.cat.categories))
+    counts = pd.Series(counts, index=values.cat.categories.tolist())
+    return counts[counts > 0].sort_values(ascending=False)
+
+# Derived columns used internally by the views but not shown or exported
+HELPER_COLUMNS = ['Week']
+
+# Per-view caches expire with the data and keep only the most recent views
+VIEW_CACHE_TTL = 3600  # seconds
+VIEW_CACHE_MAX_ENTRIES = 32
+
+# Cached per-view aggregations. The frame is passed with a leading underscore so Streamlit
+# skips hashing it; view_key (selected countries, date range, data version) is the cache key.
+@st.cache_data(ttl=VIEW_CACHE_TTL, max_entries=VIEW_CACHE_MAX_ENTRIES)
+def get_country_mask(_country, selected_countries, data_version):
+    """Boolean row mask for the selected countries, compared on category codes"""
+    selected_codes = _country.cat.categories.get_indexer(list(selected_countries))
+    return np.isin(_country.cat.codes.to_numpy(), selected_codes)
+
+@st.cache_data(ttl=VIEW_CACHE_TTL, max_entries=VIEW_CACHE_MAX_ENTRIES)
+def get_daily_trend(_df, view_key):
+    """Mean vaccination percentages per date"""
+    return _df.groupby('Date').agg({
+        'Fully_Vaccinated_Percentage': 'mean',
+        'Partially_Vaccinated_Percentage': 'mean'
+    }).reset_index()
+
+@st.cache_data(ttl=VIEW_CACHE_TTL, max_entries=VIEW_CACHE_MAX_ENTRIES)
+def get_latest_by_country(_df, view_key):
+    """Most recent row for each country"""
+    return _df.loc[_df.groupby('Country', sort=False, observed=True)['Date'].idxmax()].reset_index(drop=True)
+
+@st.cache_data(ttl=VIEW_CACHE_TTL, max_entries=VIEW_CACHE_MAX_ENTRIES)
+def get_daily_totals(_df, view_key):
+    """Total daily vaccinations per date"""
+    return _df.groupby('Date')['Daily_Vaccinations'].sum().reset_index()
+
+@st.cache_data(ttl=VIEW_CACHE_TTL, max_entries=VIEW_CACHE_MAX_ENTRIES)
+def get_vaccine_distribution(_df, view_key):
+    """Row counts per vaccine type"""
+    counts = count_categories(_df['Vaccine_Type'])
+    return pd.DataFrame({'Vaccine_Type': counts.index, 'Count': counts.values})
+
+@st.cache_data(ttl=VIEW_CACHE_TTL, max_entries=VIEW_CACHE_MAX_ENTRIES)
+def get_weekly_progression(_df, view_key):
+    """Last fully-vaccinated percentage per country and ISO week"""
+    return _df.groupby(['Country', 'Week'], observed=True).agg({
+        'Fully_Vaccinated_Percentage': 'last'
+    }).reset_index()
+
+@st.cache_data(ttl=VIEW_CACHE_TTL, max_entries=VIEW_CACHE_MAX_ENTRIES)
+def get_numeric_summary(_df, view_key):
+    """Summary statistics of the numerical columns"""
+    return _df.drop(columns=HELPER_COLUMNS).describe()
+
+@st.cache_data(ttl=VIEW_CACHE_TTL, max_entries=VIEW_CACHE_MAX_ENTRIES)
+def get_countries_in_view(_df, view_key):
+    """Countries present in the filtered data in order of first appearance, read via the Country codes"""
+    country = _df['Country']
+    return country.cat.categories[pd.unique(country.cat.codes.to_numpy())].tolist()
+
+DataInfo = namedtuple('DataInfo', ['rows', 'columns', 'first_date', 'last_date', 'countries'])
+
+@st.cache_data(ttl=VIEW_CACHE_TTL, max_entries=VIEW_CACHE_MAX_ENTRIES)
+def get_data_info(_df, view_key):
+    """Row/column counts, date range and country count of the filtered data"""
+    return DataInfo(len(_df), len(_df.columns.drop(HELPER_COLUMNS)), _df['Date'].min().date(), _df['Date'].max().date(),
+                    _df['Country'].nunique())
+
+@st.cache_data(ttl=VIEW_CACHE_TTL, max_entries=VIEW_CACHE_MAX_ENTRIES)
+def get_grid_preview(_df, view_key):
+    """First 1000 rows for the Data Explorer table"""
+    return _df.head(1000).drop(columns=HELPER_COLUMNS)
+
+def build_grid_options(preview):
+    """AgGrid options for the Data Explorer table (not cached: the builder's options don't pickle)"""
+    gb = GridOptionsBuilder.from_dataframe(preview)
+    gb.configure_pagination(paginationAutoPageSize=True)
+    gb.configure_side_bar()
+    gb.configure_default_column(groupable=True, value=True, enableRowGroup=True, aggFunc="sum", editable=False)
+    gb.configure_grid_options(rowBuffer=20, suppressColumnVirtualisation=False)
+    return gb.build()
+
+@st.cache_data(ttl=VIEW_CACHE_TTL, max_entries=VIEW_CACHE_MAX_ENTRIES)
+def get_csv_bytes(_df, view_key):
+    """Filtered data encoded as CSV for download"""
+    buffer = io.BytesIO()
+    _df.to_csv(buffer, columns=_df.columns.drop(HELPER_COLUMNS), index=False, date_format='%Y-%m-%d', float_format='%.2f')
+    return buffer.getvalue()
+
+# Cached figure builders, keyed like the aggregations above so repeat renders skip figure construction
+@st.cache_data(ttl=VIEW_CACHE_TTL, max_entries=VIEW_CACHE_MAX_ENTRIES)
+def build_trend_fig(_daily_avg, view_key):
+    """Overview vaccination progress line chart"""
+    # WebGL traces keep dense time series off the SVG DOM; hoverinfo='x+y' keeps GL hover cheap
+    trend_points = downsample_lttb(_daily_avg, 'Date', 'Fully_Vaccinated_Percentage')
+    fig = go.Figure()
+    for column, color in [('Fully_Vaccinated_Percentage', '#00d4ff'),
+                          ('Partially_Vaccinated_Percentage', '#0066cc')]:
+        fig.add_trace(go.Scattergl(x=trend_points['Date'], y=trend_points[column],
+                                   mode='lines', name=column, line_color=color, hoverinfo='x+y'))
+    
+    fig.update_layout(
+        **DARK_LAYOUT,
+        hovermode='x unified',
+        xaxis_title='Date',
+        yaxis_title='Percentage',
+        legend_title_text='Vaccination Status',
+        legend=HORIZONTAL_LEGEND
+    )
+    return fig
+
+@st.cache_data(ttl=VIEW_CACHE_TTL, max_entries=VIEW_CACHE_MAX_ENTRIES)
+def build_country_comparison_fig(_latest_data, view_key):
+    """Overview horizontal bar chart of the latest rate per country"""
+    fig = px.bar(_latest_data.sort_values('Fully_Vaccinated_Percentage', ascending=True),
+                x='Fully_Vaccinated_Percentage',
+                y='Country',
+                orientation='h',
+                color='Fully_Vaccinated_Percentage',
+                color_continuous_scale=BLUES,
+                text='Fully_Vaccinated_Percentage')
+    
+    fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
+    fig.update_layout(
+        **DARK_LAYOUT,
+        showlegend=False,
+        yaxis=dict(categoryorder='total ascending')
+    )
+    return fig
+
+@st.cache_data(ttl=VIEW_CACHE_TTL, max_entries=VIEW_CACHE_MAX_ENTRIES)
+def build_daily_totals_fig(_daily_totals, view_key):
+    """Overview daily vaccinations area chart"""
+    totals_points = downsample_lttb(_daily_totals, 'Date', 'Daily_Vaccinations')
+    fig = go.Figure(go.Scattergl(x=totals_points['Date'], y=totals_points['Daily_Vaccinations'],
+                                 mode='lines', fill='tozeroy', line_color='#00d4ff', hoverinfo='x+y'))
+    
+    fig.update_layout(
+        **DARK_LAYOUT,
+        xaxis_title='Date',
+        yaxis_title='Daily_Vaccinations'
+    )
+    return fig
+
+@st.cache_data(ttl=VIEW_CACHE_TTL, max_entries=VIEW_CACHE_MAX_ENTRIES)
+def build_vaccine_pie_fig(_vaccine_dist, view_key):
+    """Overview vaccine distribution donut chart"""
+    fig = px.pie(_vaccine_dist, values='Count', names='Vaccine_Type',
+                color_discrete_sequence=BLUES_R,
+                hole=0.4)
+    
+    fig.update_layout(
+        **DARK_LAYOUT,
+        showlegend=True,
+        legend=dict(
+            orientation="v",
+            yanchor="middle",
+            y=0.5,
+            xanchor="left",
+            x=1.2
+        )
+    )
+    return fig
+
+@st.cache_data(ttl=VIEW_CACHE_TTL, max_entries=VIEW_CACHE_MAX_ENTRIES)
+def build_weekly_fig(_weekly_data, view_key):
+    """Trends weekly progression line chart per country"""
+    fig = px.line(_weekly_data, x='Week', y='Fully_Vaccinated_Percentage',
+                 color='Country', line_dash='Country',
+                 color_discrete_sequence=SET2)
+    
+    fig.update_layout(
+        **DARK_LAYOUT,
+        hovermode='x unified'
+    )
+    return fig
+
+# Pages that never read the filtered data
+UNFILTERED_PAGES = ("🌍 Global Map", "⚙️ Settings")
+
+def get_filtered_df(df, page, selected_countries, start_date, end_date):
+    """Filter data by country and date range for the given page (None for pages that don't use it)"""
+    if page in UNFILTERED_PAGES:
+        return None
+    
+    if 'All Countries' not in selected_countries and selected_countries:
+        df = df[get_country_mask(df['Country'], tuple(selected_countries), st.session_state.last_update)]
+    
+    # Data is sorted by Date, so the range filter is a binary search instead of a per-row scan
+    lo, hi = df['Date'].searchsorted([pd.Timestamp(start_date), pd.Timestamp(end_date) + pd.Timedelta(days=1)])
+    return df.iloc[lo:hi]
+
 # Main app
 def main():
     # Sidebar Navigation
@@ -248,12 +539,8 @@ def main():
         df = st.session_state.vaccine_data
     
     # Filter data based on selections
-    if 'All Countries' not in selected_countries and selected_countries:
-        df = df[df['Country'].isin(selected_countries)]
-    
-    df['Date'] = pd.to_datetime(df['Date'])
-    mask = (df['Date'].dt.date >= start_date) & (df['Date'].dt.date <= end_date)
-    df_filtered = df.loc[mask]
+    df_filtered = get_filtered_df(df, selected, selected_countries, start_date, end_date)
+    view_key = (tuple(selected_countries), start_date, end_date, st.session_state.last_update)
     
     # Overview Page
     if selected == "📊 Overview":
@@ -294,31 +581,9 @@ def main():
             st.markdown("### 📈 Vaccination Progress Trend")
             
             # Aggregate by date
-            daily_avg = df_filtered.groupby('Date').agg({
-                'Fully_Vaccinated_Percentage': 'mean',
-                'Partially_Vaccinated_Percentage': 'mean'
-            }).reset_index()
-            
-            fig = px.line(daily_avg, x='Date', y=['Fully_Vaccinated_Percentage', 'Partially_Vaccinated_Percentage'],
-                         color_discrete_map={
-                             'Fully_Vaccinated_Percentage': '#00d4ff',
-                             'Partially_Vaccinated_Percentage': '#0066cc'
-                         },
-                         labels={'value': 'Percentage', 'variable': 'Vaccination Status'})
+            daily_avg = get_daily_trend(df_filtered, view_key)
             
-            fig.update_layout(
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font_color='white',
-                hovermode='x unified',
-                legend=dict(
-                    orientation="h",
-                    yanchor="bottom",
-                    y=1.02,
-                    xanchor="right",
-                    x=1
-                )
-            )
+            fig = build_trend_fig(daily_avg, view_key)
             st.plotly_chart(fig, use_container_width=True)
             st.markdown("</div>", unsafe_allow_html=True)
         
@@ -327,24 +592,9 @@ def main():
             st.markdown("### 🌍 Country Comparison")
             
             # Latest data for each country
-            latest_data = df_filtered.sort_values('Date').groupby('Country').last().reset_index()
-            
-            fig = px.bar(latest_data.sort_values('Fully_Vaccinated_Percentage', ascending=True),
-                        x='Fully_Vaccinated_Percentage',
-                        y='Country',
-                        orientation='h',
-                        color='Fully_Vaccinated_Percentage',
-                        color_continuous_scale='Blues',
-                        text='Fully_Vaccinated_Percentage')
+            latest_data = get_latest_by_country(df_filtered, view_key)
             
-            fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-            fig.update_layout(
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font_color='white',
-                showlegend=False,
-                yaxis=dict(categoryorder='total ascending')
-            )
+            fig = build_country_comparison_fig(latest_data, view_key)
             st.plotly_chart(fig, use_container_width=True)
             st.markdown("</div>", unsafe_allow_html=True)
         
@@ -355,16 +605,9 @@ def main():
             st.markdown("<div class='card'>", unsafe_allow_html=True)
             st.markdown("### 🚀 Daily Vaccination Rate")
             
-            daily_totals = df_filtered.groupby('Date')['Daily_Vaccinations'].sum().reset_index()
-            
-            fig = px.area(daily_totals, x='Date', y='Daily_Vaccinations',
-                         color_discrete_sequence=['#00d4ff'])
+            daily_totals = get_daily_totals(df_filtered, view_key)
             
-            fig.update_layout(
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font_color='white'
-            )
+            fig = build_daily_totals_fig(daily_totals, view_key)
             st.plotly_chart(fig, use_container_width=True)
             st.markdown("</div>", unsafe_allow_html=True)
         
@@ -372,26 +615,9 @@ def main():
             st.markdown("<div class='card'>", unsafe_allow_html=True)
             st.markdown("### 💉 Vaccine Distribution")
             
-            vaccine_dist = df_filtered['Vaccine_Type'].value_counts().reset_index()
-            vaccine_dist.columns = ['Vaccine_Type', 'Count']
+            vaccine_dist = get_vaccine_distribution(df_filtered, view_key)
             
-            fig = px.pie(vaccine_dist, values='Count', names='Vaccine_Type',
-                        color_discrete_sequence=px.colors.sequential.Blues_r,
-                        hole=0.4)
-            
-            fig.update_layout(
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font_color='white',
-                showlegend=True,
-                legend=dict(
-                    orientation="v",
-                    yanchor="middle",
-                    y=0.5,
-                    xanchor="left",
-                    x=1.2
-                )
-            )
+            fig = build_vaccine_pie_fig(vaccine_dist, view_key)
             st.plotly_chart(fig, use_container_width=True)
             st.markdown("</div>", unsafe_allow_html=True)
     
@@ -405,17 +631,15 @@ def main():
         countries_geo = ['USA', 'India', 'Brazil', 'United Kingdom', 'Germany', 
                         'Japan', 'France', 'Italy', 'Canada', 'Australia']
         
-        geo_data = []
-        for country in countries_geo:
-            geo_data.append({
-                'Country': country,
-                'Fully_Vaccinated': np.random.randint(50, 95),
-                'Lat': np.random.uniform(-50, 70),
-                'Lon': np.random.uniform(-180, 180),
-                'Doses_Administered': np.random.randint(1000000, 1000000000)
-            })
-        
-        geo_df = pd.DataFrame(geo_data)
+        rng = np.random.default_rng()
+        n_geo = len(countries_geo)
+        geo_df = pd.DataFrame({
+            'Country': countries_geo,
+            'Fully_Vaccinated': rng.integers(50, 95, size=n_geo),
+            'Lat': rng.uniform(-50, 70, size=n_geo),
+            'Lon': rng.uniform(-180, 180, size=n_geo),
+            'Doses_Administered': rng.integers(1000000, 1000000000, size=n_geo)
+        })
         
         fig = px.scatter_geo(geo_df,
                             lat='Lat',
@@ -424,7 +648,7 @@ def main():
                             size='Doses_Administered',
                             hover_name='Country',
                             projection='natural earth',
-                            color_continuous_scale='Blues',
+                            color_continuous_scale=BLUES,
                             title='Global Vaccination Coverage',
                             size_max=50)
         
@@ -436,9 +660,7 @@ def main():
                 showcountries=True,
                 countrycolor='rgb(100, 100, 120)'
             ),
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font_color='white',
+            **DARK_LAYOUT,
             height=600
         )
         
@@ -467,21 +689,9 @@ def main():
             st.markdown("<div class='card'>", unsafe_allow_html=True)
             st.markdown("### 📊 Weekly Progression")
             
-            df_filtered['Week'] = df_filtered['Date'].dt.isocalendar().week
-            weekly_data = df_filtered.groupby(['Country', 'Week']).agg({
-                'Fully_Vaccinated_Percentage': 'last'
-            }).reset_index()
-            
-            fig = px.line(weekly_data, x='Week', y='Fully_Vaccinated_Percentage',
-                         color='Country', line_dash='Country',
-                         color_discrete_sequence=px.colors.qualitative.Set2)
+            weekly_data = get_weekly_progression(df_filtered, view_key)
             
-            fig.update_layout(
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font_color='white',
-                hovermode='x unified'
-            )
+            fig = build_weekly_fig(weekly_data, view_key)
             st.plotly_chart(fig, use_container_width=True)
             st.markdown("</div>", unsafe_allow_html=True)
         
@@ -490,17 +700,16 @@ def main():
             st.markdown("### 🔄 Rate of Change")
             
             # Calculate daily changes
-            df_sorted = df_filtered.sort_values(['Country', 'Date'])
-            df_sorted['Daily_Change'] = df_sorted.groupby('Country')['Fully_Vaccinated_Percentage'].diff()
+            # Rows are already date-ordered, so a stable sort by country gives (Country, Date) order
+            df_sorted = df_filtered.sort_values('Country', kind='stable')
+            df_sorted['Daily_Change'] = group_diff(df_sorted['Fully_Vaccinated_Percentage'], df_sorted['Country'].cat.codes)
             
             fig = px.box(df_sorted, x='Country', y='Daily_Change',
                         color='Country',
                         points="all")
             
             fig.update_layout(
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font_color='white',
+                **DARK_LAYOUT,
                 showlegend=False
             )
             st.plotly_chart(fig, use_container_width=True)
@@ -512,24 +721,22 @@ def main():
         
         # Simple forecast visualization
         forecast_dates = pd.date_range(start=end_date, periods=30, freq='D')
-        forecast_values = []
-        
-        for i in range(30):
-            forecast_values.append(current_avg_vax + (i * 0.15) + np.random.normal(0, 0.5))
+        rng = np.random.default_rng()
+        forecast_values = current_avg_vax + np.arange(30) * 0.15 + rng.normal(0, 0.5, size=30)
         
         forecast_df = pd.DataFrame({
             'Date': forecast_dates,
             'Forecast': forecast_values,
-            'Upper_Bound': [v + 2 for v in forecast_values],
-            'Lower_Bound': [v - 2 for v in forecast_values]
+            'Upper_Bound': forecast_values + 2,
+            'Lower_Bound': forecast_values - 2
         })
         
         fig = go.Figure()
         
         # Add confidence interval
         fig.add_trace(go.Scatter(
-            x=forecast_df['Date'].tolist() + forecast_df['Date'].tolist()[::-1],
-            y=forecast_df['Upper_Bound'].tolist() + forecast_df['Lower_Bound'].tolist()[::-1],
+            x=np.concatenate([forecast_dates.values, forecast_dates.values[::-1]]),
+            y=np.concatenate([forecast_df['Upper_Bound'].values, forecast_df['Lower_Bound'].values[::-1]]),
             fill='toself',
             fillcolor='rgba(0, 212, 255, 0.2)',
             line_color='rgba(255,255,255,0)',
@@ -547,9 +754,7 @@ def main():
         ))
         
         fig.update_layout(
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font_color='white',
+            **DARK_LAYOUT,
             title="30-Day Vaccination Rate Forecast",
             xaxis_title="Date",
             yaxis_title="Vaccination Rate (%)",
@@ -564,7 +769,7 @@ def main():
         st.markdown("<h1 style='text-align: center;'>🔍 COUNTRY-SPECIFIC ANALYSIS</h1>", unsafe_allow_html=True)
         
         # Country selector
-        country = st.selectbox("Select Country", df_filtered['Country'].unique())
+        country = st.selectbox("Select Country", get_countries_in_view(df_filtered, view_key))
         
         if country:
             country_data = df_filtered[df_filtered['Country'] == country]
@@ -572,14 +777,14 @@ def main():
             col1, col2, col3 = st.columns(3)
             
             with col1:
-                latest = country_data.iloc[-1]
-                st.metric(f"{country} - Fully Vaccinated", f"{latest['Fully_Vaccinated_Percentage']:.1f}%")
+                # Rows are date-sorted, so the last row of each column is the latest value
+                st.metric(f"{country} - Fully Vaccinated", f"{country_data['Fully_Vaccinated_Percentage'].iat[-1]:.1f}%")
             
             with col2:
-                st.metric("Total Doses", f"{country_data['Doses_Administered'].iloc[-1]:,}")
+                st.metric("Total Doses", f"{country_data['Doses_Administered'].iat[-1]:,}")
             
             with col3:
-                st.metric("Daily Rate", f"{latest['Daily_Vaccinations']:,}")
+                st.metric("Daily Rate", f"{country_data['Daily_Vaccinations'].iat[-1]:,}")
             
             # Country-specific charts
             col1, col2 = st.columns(2)
@@ -588,14 +793,17 @@ def main():
                 st.markdown("<div class='card'>", unsafe_allow_html=True)
                 st.markdown(f"### 📊 {country} Vaccination Timeline")
                 
-                fig = px.line(country_data, x='Date', 
-                             y=['Fully_Vaccinated_Percentage', 'Partially_Vaccinated_Percentage'],
-                             color_discrete_sequence=['#00d4ff', '#0066cc'])
+                timeline_points = downsample_lttb(country_data, 'Date', 'Fully_Vaccinated_Percentage')
+                fig = go.Figure()
+                for column, color in [('Fully_Vaccinated_Percentage', '#00d4ff'),
+                                      ('Partially_Vaccinated_Percentage', '#0066cc')]:
+                    fig.add_trace(go.Scattergl(x=timeline_points['Date'], y=timeline_points[column],
+                                               mode='lines', name=column, line_color=color, hoverinfo='x+y'))
                 
                 fig.update_layout(
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    font_color='white'
+                    **DARK_LAYOUT,
+                    xaxis_title='Date',
+                    yaxis_title='value'
                 )
                 st.plotly_chart(fig, use_container_width=True)
                 st.markdown("</div>", unsafe_allow_html=True)
@@ -604,17 +812,15 @@ def main():
                 st.markdown("<div class='card'>", unsafe_allow_html=True)
                 st.markdown(f"### 💉 {country} Vaccine Types")
                 
-                vaccine_counts = country_data['Vaccine_Type'].value_counts()
+                vaccine_counts = count_categories(country_data['Vaccine_Type'])
                 
                 fig = px.bar(x=vaccine_counts.index, y=vaccine_counts.values,
                             color=vaccine_counts.values,
-                            color_continuous_scale='Blues',
+                            color_continuous_scale=BLUES,
                             text=vaccine_counts.values)
                 
                 fig.update_layout(
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    font_color='white',
+                    **DARK_LAYOUT,
                     showlegend=False,
                     xaxis_title="Vaccine Type",
                     yaxis_title="Count"
@@ -632,23 +838,23 @@ def main():
         st.markdown("### 🔍 Raw Data Preview")
         
         # Use AgGrid for better table display
-        gb = GridOptionsBuilder.from_dataframe(df_filtered.head(1000))
-        gb.configure_pagination(paginationAutoPageSize=True)
-        gb.configure_side_bar()
-        gb.configure_default_column(groupable=True, value=True, enableRowGroup=True, aggFunc="sum", editable=False)
-        grid_options = gb.build()
+        # Rows are cached per view; NO_UPDATE with a fixed key keeps the grid from
+        # re-processing its data on unrelated reruns
+        preview = get_grid_preview(df_filtered, view_key)
+        grid_options = build_grid_options(preview)
         
-        AgGrid(df_filtered.head(1000), 
+        AgGrid(preview, 
                gridOptions=grid_options,
                theme='streamlit',
                height=400,
+               update_mode=GridUpdateMode.NO_UPDATE,
+               key='explorer-grid',
                enable_enterprise_modules=False)
         
         # Data download option
-        csv = df_filtered.to_csv(index=False)
         st.download_button(
             label="📥 Download Current Data (CSV)",
-            data=csv,
+            data=get_csv_bytes(df_filtered, view_key),
             file_name=f"vaccination_data_{datetime.now().strftime('%Y%m%d')}.csv",
             mime="text/csv",
             use_container_width=True
@@ -663,15 +869,16 @@ def main():
         
         with col1:
             st.write("**Numerical Columns:**")
-            st.dataframe(df_filtered.describe(), use_container_width=True)
+            st.dataframe(get_numeric_summary(df_filtered, view_key), use_container_width=True)
         
         with col2:
             st.write("**Data Information:**")
+            info = get_data_info(df_filtered, view_key)
             buffer = []
-            buffer.append(f"Total Rows: {len(df_filtered):,}")
-            buffer.append(f"Total Columns: {len(df_filtered.columns)}")
-            buffer.append(f"Date Range: {df_filtered['Date'].min().date()} to {df_filtered['Date'].max().date()}")
-            buffer.append(f"Countries: {df_filtered['Country'].nunique()}")
+            buffer.append(f"Total Rows: {info.rows:,}")
+            buffer.append(f"Total Columns: {info.columns}")
+            buffer.append(f"Date Range: {info.first_date} to {info.last_date}")
+            buffer.append(f"Countries: {info.countries}")
             
             for line in buffer:
                 st.write(f"• {line}")